@@ -1,4 +1,12 @@
+import heapq
+import os
+from array import array
 from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import add, mul
+from tempfile import TemporaryDirectory
 
 
 def parse_lists() -> tuple[list[int], list[int]]:
@@ -44,6 +52,375 @@ def part_two(list_one: list[int], list_two: list[int]) -> int:
     return sum(similarities)
 
 
+def iter_list_chunks(
+    path: str = "day1/day1.txt",
+    chunk_size: int = 1 << 24,
+    start: int = 0,
+    end: int | None = None,
+) -> Iterator[tuple[array, array]]:
+    # Reads in large byte chunks, carrying any partial trailing line over
+    # into the next chunk so each yielded pair of arrays is line-aligned.
+    # start and end must already fall on line boundaries.
+    remainder = b""
+    with open(path, "rb") as fobj:
+        fobj.seek(start)
+        to_read = (end if end is not None else os.path.getsize(path)) - start
+        while to_read > 0 and (chunk := fobj.read(min(chunk_size, to_read))):
+            to_read -= len(chunk)
+            chunk = remainder + chunk
+            line_end = chunk.rfind(b"\n") + 1
+            remainder = chunk[line_end:]
+            if line_end:
+                yield parse_list_chunk(chunk[:line_end])
+
+    if remainder.strip():
+        yield parse_list_chunk(remainder)
+
+
+def parse_list_chunk(chunk: bytes) -> tuple[array, array]:
+    tokens = chunk.split()
+    return array("q", map(int, tokens[0::2])), array("q", map(int, tokens[1::2]))
+
+
+def count_locations(values: array, histogram: array):
+    if not values:
+        return
+    if min(values) < 0 or max(values) >= len(histogram):
+        raise ValueError(f"Locations must be within 0..{len(histogram) - 1}")
+    # Counter's counting loop runs in C and only holds the distinct values
+    for value, count in Counter(values).items():
+        histogram[value] += count
+
+
+def parse_histograms_bulk(
+    path: str = "day1/day1.txt",
+    chunk_size: int = 1 << 24,
+    max_location: int = 99_999,
+) -> tuple[array, array]:
+    histogram_one = array("q", bytes(8 * (max_location + 1)))
+    histogram_two = array("q", bytes(8 * (max_location + 1)))
+
+    for chunk_one, chunk_two in iter_list_chunks(path, chunk_size):
+        count_locations(chunk_one, histogram_one)
+        count_locations(chunk_two, histogram_two)
+
+    return histogram_one, histogram_two
+
+
+def part_one_histograms(histogram_one: array, histogram_two: array) -> int:
+    """Pairs both lists by rank by walking their histograms in lockstep."""
+    assert sum(histogram_one) == sum(histogram_two)
+    total_distance = 0
+    value_two = 0
+    left_two = histogram_two[0]
+
+    for value_one, left_one in enumerate(histogram_one):
+        while left_one:
+            while not left_two:
+                value_two += 1
+                left_two = histogram_two[value_two]
+            step = min(left_one, left_two)
+            total_distance += step * abs(value_one - value_two)
+            left_one -= step
+            left_two -= step
+
+    return total_distance
+
+
+def part_two_histograms(histogram_one: array, histogram_two: array) -> int:
+    return sum(
+        map(mul, map(mul, range(len(histogram_one)), histogram_one), histogram_two)
+    )
+
+
+def sort_list(values: array) -> array:
+    return array(values.typecode, sorted(values))
+
+
+def main_bulk():
+    histogram_one, histogram_two = parse_histograms_bulk()
+
+    print("Part One:")
+    print(part_one_histograms(histogram_one, histogram_two))
+
+    print("Part Two:")
+    print(part_two_histograms(histogram_one, histogram_two))
+
+
+def spill_sorted_runs(
+    path: str, run_size: int, run_dir: str
+) -> tuple[list[str], list[str]]:
+    runs_one: list[str] = []
+    runs_two: list[str] = []
+    buffer_one = array("q")
+    buffer_two = array("q")
+
+    def spill():
+        for buffer, runs in ((buffer_one, runs_one), (buffer_two, runs_two)):
+            run_path = os.path.join(run_dir, f"run{len(runs_one) + len(runs_two)}")
+            with open(run_path, "wb") as fobj:
+                sort_list(buffer).tofile(fobj)
+            runs.append(run_path)
+            del buffer[:]
+
+    for chunk_one, chunk_two in iter_list_chunks(path, min(run_size, 1 << 24)):
+        buffer_one.extend(chunk_one)
+        buffer_two.extend(chunk_two)
+        if len(buffer_one) >= run_size:
+            spill()
+
+    if buffer_one:
+        spill()
+
+    return runs_one, runs_two
+
+
+def iter_run(run_path: str, block_size: int = 1 << 16) -> Iterator[int]:
+    with open(run_path, "rb") as fobj:
+        while True:
+            block = array("q")
+            try:
+                block.fromfile(fobj, block_size)
+            except EOFError:
+                # Partial final block, fromfile still keeps what it read
+                yield from block
+                return
+            yield from block
+
+
+def merged_counts(runs: list[str]) -> Iterator[tuple[int, int]]:
+    merged = heapq.merge(*(iter_run(run) for run in runs))
+    for value, group in groupby(merged):
+        yield value, sum(1 for _ in group)
+
+
+def part_one_two_external(
+    path: str = "day1/day1.txt", run_size: int = 1 << 22
+) -> tuple[int, int]:
+    """
+    Both columns are merged as run-length (value, count) groups and walked
+    in lockstep by rank for the distances. Similarity is a second pass that
+    merge-joins fresh group iterators on value, so both passes only hold
+    one buffered block per run file.
+    """
+    with TemporaryDirectory() as run_dir:
+        runs_one, runs_two = spill_sorted_runs(path, run_size, run_dir)
+
+        total_distance = 0
+        groups_one = merged_counts(runs_one)
+        groups_two = merged_counts(runs_two)
+        value_one, left_one = next(groups_one, (None, 0))
+        value_two, left_two = next(groups_two, (None, 0))
+
+        while value_one is not None and value_two is not None:
+            step = min(left_one, left_two)
+            total_distance += step * abs(value_one - value_two)
+            left_one -= step
+            left_two -= step
+            if left_one == 0:
+                value_one, left_one = next(groups_one, (None, 0))
+            if left_two == 0:
+                value_two, left_two = next(groups_two, (None, 0))
+
+        assert value_one is None and value_two is None
+
+        similarity = 0
+        groups_one = merged_counts(runs_one)
+        groups_two = merged_counts(runs_two)
+        value_one, count_one = next(groups_one, (None, 0))
+        value_two, count_two = next(groups_two, (None, 0))
+
+        while value_one is not None and value_two is not None:
+            if value_one == value_two:
+                similarity += value_one * count_one * count_two
+            if value_one <= value_two:
+                value_one, count_one = next(groups_one, (None, 0))
+            else:
+                value_two, count_two = next(groups_two, (None, 0))
+
+    return total_distance, similarity
+
+
+def main_external():
+    total_distance, similarity = part_one_two_external()
+
+    print("Part One:")
+    print(total_distance)
+
+    print("Part Two:")
+    print(similarity)
+
+
+class LocationIndex:
+    """
+    Keeps both parts up to date as location pairs are appended.
+
+    Sorted pairing distance equals the sum over every threshold t of
+    |A(t) - B(t)|, where A(t) and B(t) count the list one and list two
+    values <= t. Appending (x, y) shifts that difference by one over the
+    thresholds between x and y, so the distance change is read off how many
+    of those thresholds are currently non-negative. Thresholds are split into
+    blocks with a lazy offset and a histogram so whole blocks update in O(1).
+    """
+
+    def __init__(self, max_location: int = 99_999, block_size: int = 256):
+        self.max_location = max_location
+        self.block_size = block_size
+        num_blocks = max_location // block_size + 1
+
+        self.total_distance = 0
+        self.similarity = 0
+        self.counts_one: Counter[int] = Counter()
+        self.counts_two: Counter[int] = Counter()
+
+        # Difference at each threshold is diffs[t] + offsets[t // block_size]
+        self.diffs = array("q", bytes(8 * num_blocks * block_size))
+        self.offsets = [0] * num_blocks
+        self.histograms = [Counter({0: block_size}) for _ in range(num_blocks)]
+        self.non_negative = [block_size] * num_blocks
+
+    def add_pair(self, first: int, second: int):
+        if not (0 <= first <= self.max_location and 0 <= second <= self.max_location):
+            raise ValueError(f"Location out of range: {first}, {second}")
+
+        self.similarity += first * self.counts_two[first]
+        self.counts_one[first] += 1
+        self.similarity += second * self.counts_one[second]
+        self.counts_two[second] += 1
+
+        if first < second:
+            self.total_distance += self._shift(first, second, 1)
+        elif second < first:
+            self.total_distance += self._shift(second, first, -1)
+
+    def add_pairs(self, pairs: Iterable[tuple[int, int]]):
+        for first, second in pairs:
+            self.add_pair(first, second)
+
+    def _shift(self, start: int, end: int, delta: int) -> int:
+        block_size = self.block_size
+        change = 0
+        first_block = start // block_size
+        last_block = (end - 1) // block_size
+
+        for block in range(first_block, last_block + 1):
+            block_start = block * block_size
+            block_end = block_start + block_size
+            if start <= block_start and block_end <= end:
+                change += self._shift_block(block, delta)
+            else:
+                change += self._shift_thresholds(
+                    block, max(start, block_start), min(end, block_end), delta
+                )
+
+        return change
+
+    def _shift_block(self, block: int, delta: int) -> int:
+        offset = self.offsets[block]
+        histogram = self.histograms[block]
+        non_negative = self.non_negative[block]
+
+        if delta > 0:
+            # |d + 1| - |d| is +1 for d >= 0 and -1 otherwise
+            change = 2 * non_negative - self.block_size
+            self.non_negative[block] = non_negative + histogram[-offset - 1]
+        else:
+            # |d - 1| - |d| is -1 for d > 0 and +1 otherwise
+            positive = non_negative - histogram[-offset]
+            change = self.block_size - 2 * positive
+            self.non_negative[block] = positive
+
+        self.offsets[block] = offset + delta
+        return change
+
+    def _shift_thresholds(self, block: int, start: int, end: int, delta: int) -> int:
+        offset = self.offsets[block]
+        histogram = self.histograms[block]
+        diffs = self.diffs
+        change = 0
+
+        for threshold in range(start, end):
+            raw = diffs[threshold]
+            diff = raw + offset
+            new_diff = diff + delta
+            change += abs(new_diff) - abs(diff)
+            if diff < 0 <= new_diff:
+                self.non_negative[block] += 1
+            elif new_diff < 0 <= diff:
+                self.non_negative[block] -= 1
+            histogram[raw] -= 1
+            histogram[raw + delta] += 1
+            diffs[threshold] = raw + delta
+
+        return change
+
+
+def find_shard_bounds(path: str, num_shards: int) -> list[int]:
+    file_size = os.path.getsize(path)
+    bounds = [0]
+
+    with open(path, "rb") as fobj:
+        for shard in range(1, num_shards):
+            # Move each split point forward to the start of the next line
+            fobj.seek(max(file_size * shard // num_shards - 1, bounds[-1]))
+            fobj.readline()
+            bounds.append(max(fobj.tell(), bounds[-1]))
+
+    bounds.append(file_size)
+    return bounds
+
+
+def process_shard(
+    path: str, start: int, end: int, max_location: int
+) -> tuple[array, array]:
+    histogram_one = array("q", bytes(8 * (max_location + 1)))
+    histogram_two = array("q", bytes(8 * (max_location + 1)))
+
+    for chunk_one, chunk_two in iter_list_chunks(path, start=start, end=end):
+        count_locations(chunk_one, histogram_one)
+        count_locations(chunk_two, histogram_two)
+
+    return histogram_one, histogram_two
+
+
+def part_one_two_sharded(
+    path: str = "day1/day1.txt",
+    num_workers: int | None = None,
+    max_location: int = 99_999,
+) -> tuple[int, int]:
+    num_workers = num_workers or os.cpu_count() or 1
+    bounds = find_shard_bounds(path, num_workers)
+    histogram_one = array("q", bytes(8 * (max_location + 1)))
+    histogram_two = array("q", bytes(8 * (max_location + 1)))
+
+    with ProcessPoolExecutor(num_workers) as executor:
+        shards = executor.map(
+            process_shard,
+            [path] * num_workers,
+            bounds,
+            bounds[1:],
+            [max_location] * num_workers,
+        )
+        for shard_one, shard_two in shards:
+            histogram_one = array("q", map(add, histogram_one, shard_one))
+            histogram_two = array("q", map(add, histogram_two, shard_two))
+
+    return (
+        part_one_histograms(histogram_one, histogram_two),
+        part_two_histograms(histogram_one, histogram_two),
+    )
+
+
+def main_sharded():
+    total_distance, similarity = part_one_two_sharded()
+
+    print("Part One:")
+    print(total_distance)
+
+    print("Part Two:")
+    print(similarity)
+
+
 def main():
     list_one, list_two = parse_lists()
     list_one.sort()
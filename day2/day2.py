@@ -1,3 +1,15 @@
+import os
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice, repeat
+from operator import neg, sub
+
+# Maps a step clamped to 0..4 onto 1 when it is unsafe, i.e. not 1..3
+UNSAFE_STEP_TABLE = bytes((1, 0, 0, 0, 1)) + bytes(251)
+
+
 def parse_reports() -> list[tuple[int, ...]]:
     with open("day2/day2.txt") as fobj:
         lines = fobj.readlines()
@@ -22,16 +34,38 @@ def part_two(reports: list[tuple[int, ...]]):
 
 
 def is_dampen_safe(unsafe_report: tuple[int, ...]):
-    solutions: list[tuple[int, ...]] = []
-    for i in range(len(unsafe_report)):
-        if i == 0:
-            solutions.append(unsafe_report[1:])
-        else:
-            solutions.append(
-                unsafe_report[0:i] + unsafe_report[i + 1 : len(unsafe_report)]
-            )
+    bad_index = find_unsafe_index(unsafe_report)
+    if bad_index is None:
+        return True
+
+    # Only the levels around the first bad pair can fix it. The one before
+    # the pair matters when the first step set the wrong direction.
+    return any(
+        find_unsafe_index(unsafe_report, skip) is None
+        for skip in (bad_index - 2, bad_index - 1, bad_index)
+        if skip >= 0
+    )
+
+
+def find_unsafe_index(report: tuple[int, ...], skip: int = -1) -> int | None:
+    """Index of the level ending the first unsafe pair, ignoring report[skip]."""
+    is_asc: bool | None = None
+    prev_level: int | None = None
+
+    for i, level in enumerate(report):
+        if i == skip:
+            continue
+        if prev_level is not None:
+            diff = level - prev_level
+            if not 1 <= abs(diff) <= 3:
+                return i
+            if is_asc is None:
+                is_asc = diff > 0
+            elif is_asc != (diff > 0):
+                return i
+        prev_level = level
 
-    return any(is_report_safe(sol) for sol in solutions)
+    return None
 
 
 def is_report_safe(report: tuple[int, ...]):
@@ -59,6 +93,158 @@ def is_report_safe(report: tuple[int, ...]):
     return True
 
 
+def pack_reports(reports: Iterable[tuple[int, ...]]) -> tuple[array, array]:
+    levels = array("q")
+    offsets = array("q", (0,))
+    for report in reports:
+        levels.extend(report)
+        offsets.append(len(levels))
+
+    return levels, offsets
+
+
+def unsafe_step_masks(levels: array) -> tuple[bytes, bytes]:
+    """
+    Returns ascending and descending masks over every adjacent level pair,
+    with 1 where that step breaks the rule. Steps spanning two reports are
+    included but never read.
+    """
+    diffs = array("q", map(sub, islice(levels, 1, None), levels))
+
+    def mask(steps: Iterable[int]) -> bytes:
+        clamped = map(min, map(max, steps, repeat(0)), repeat(4))
+        return bytes(clamped).translate(UNSAFE_STEP_TABLE)
+
+    return mask(diffs), mask(map(neg, diffs))
+
+
+def part_one_batch(levels: array, offsets: array) -> int:
+    asc_mask, desc_mask = unsafe_step_masks(levels)
+    num_safe_reports = 0
+
+    for start, end in zip(offsets, islice(offsets, 1, None)):
+        if (
+            asc_mask.find(1, start, end - 1) == -1
+            or desc_mask.find(1, start, end - 1) == -1
+        ):
+            num_safe_reports += 1
+
+    return num_safe_reports
+
+
+def part_two_batch(levels: array, offsets: array) -> int:
+    asc_mask, desc_mask = unsafe_step_masks(levels)
+    num_safe_reports = 0
+
+    for start, end in zip(offsets, islice(offsets, 1, None)):
+        if is_batch_dampen_safe(
+            levels, asc_mask, start, end, 1
+        ) or is_batch_dampen_safe(levels, desc_mask, start, end, -1):
+            num_safe_reports += 1
+
+    return num_safe_reports
+
+
+def is_batch_dampen_safe(
+    levels: array, mask: bytes, start: int, end: int, direction: int
+) -> bool:
+    first_bad = mask.find(1, start, end - 1)
+    if first_bad == -1:
+        return True
+    last_bad = mask.rfind(1, start, end - 1)
+    if last_bad - first_bad > 1:
+        # Removing one level only touches the two steps around it
+        return False
+
+    candidates = (
+        (first_bad + 1,) if last_bad > first_bad else (first_bad, first_bad + 1)
+    )
+    for remove in candidates:
+        if remove == start or remove == end - 1:
+            return True
+        if 1 <= (levels[remove + 1] - levels[remove - 1]) * direction <= 3:
+            return True
+
+    return False
+
+
+def main_batch():
+    levels, offsets = pack_reports(parse_reports())
+    print("Part One:")
+    print(part_one_batch(levels, offsets))
+    print("Part Two:")
+    print(part_two_batch(levels, offsets))
+
+
+def iter_report_chunks(
+    path: str = "day2/day2.txt", chunk_size: int = 1 << 22
+) -> Iterator[bytes]:
+    remainder = b""
+    with open(path, "rb") as fobj:
+        while chunk := fobj.read(chunk_size):
+            chunk = remainder + chunk
+            line_end = chunk.rfind(b"\n") + 1
+            remainder = chunk[line_end:]
+            if line_end:
+                yield chunk[:line_end]
+
+    if remainder.strip():
+        yield remainder
+
+
+def count_safe_chunk(chunk: bytes) -> tuple[int, int]:
+    num_safe = 0
+    num_dampen_safe = 0
+    for line in chunk.splitlines():
+        report = tuple(int(num) for num in line.split())
+        if not report:
+            continue
+        if is_report_safe(report):
+            num_safe += 1
+            num_dampen_safe += 1
+        elif is_dampen_safe(report):
+            num_dampen_safe += 1
+
+    return num_safe, num_dampen_safe
+
+
+def part_one_two_pipeline(
+    path: str = "day2/day2.txt",
+    chunk_size: int = 1 << 22,
+    num_workers: int | None = None,
+    max_pending: int | None = None,
+) -> tuple[int, int]:
+    num_workers = num_workers or os.cpu_count() or 1
+    # Caps how many chunks are read ahead of the workers
+    max_pending = max_pending or 2 * num_workers
+    num_safe = 0
+    num_dampen_safe = 0
+    pending: deque[Future[tuple[int, int]]] = deque()
+
+    with ProcessPoolExecutor(num_workers) as executor:
+        for chunk in iter_report_chunks(path, chunk_size):
+            if len(pending) >= max_pending:
+                chunk_safe, chunk_dampen_safe = pending.popleft().result()
+                num_safe += chunk_safe
+                num_dampen_safe += chunk_dampen_safe
+            pending.append(executor.submit(count_safe_chunk, chunk))
+
+        for future in pending:
+            chunk_safe, chunk_dampen_safe = future.result()
+            num_safe += chunk_safe
+            num_dampen_safe += chunk_dampen_safe
+
+    return num_safe, num_dampen_safe
+
+
+def main_pipeline():
+    num_safe, num_dampen_safe = part_one_two_pipeline()
+    print("Part One:")
+    print(num_safe)
+    print("Part Two:")
+    print(num_dampen_safe)
+
+
 def main():
     reports: list[tuple[int, ...]] = parse_reports()
     print("Part One:")
@@ -1,4 +1,11 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+TOKEN_REGEX = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)|do\(\)|don't\(\)")
+TOKEN_BYTES_REGEX = re.compile(TOKEN_REGEX.pattern.encode())
+# Longest token is mul(123,456)
+MAX_TOKEN_LEN = 12
 
 
 def parse_input() -> list[str]:
@@ -28,7 +35,6 @@ def part_two(instructions: list[str]):
     do_end_indexes = [match.end() for match in do_regex.finditer(inst_str)]
     dont_end_indexes = [match.end() for match in dont_regex.finditer(inst_str)]
     regions = find_enabled_regions(do_end_indexes, dont_end_indexes)
-    print(regions)
 
     for region in regions:
         line_slice = (
@@ -81,6 +87,123 @@ def find_enabled_regions(do_indexes: list[int], dont_indexes: list[int]):
     return regions
 
 
+def scan_memory(
+    path: str = "day3/day3.txt", chunk_size: int = 1 << 20
+) -> tuple[int, int]:
+    total_sum = 0
+    enabled_sum = 0
+    enabled = True
+    carry = ""
+
+    with open(path) as fobj:
+        while True:
+            chunk = fobj.read(chunk_size)
+            buffer = carry + chunk
+            # Tokens starting before safe_end are fully inside the buffer, the
+            # rest may continue into the next chunk. At EOF, take everything.
+            safe_end = len(buffer) - MAX_TOKEN_LEN + 1 if chunk else len(buffer)
+            resume = 0
+
+            for match in TOKEN_REGEX.finditer(buffer):
+                if match.start() >= safe_end:
+                    break
+                resume = match.end()
+                token = match.group()
+                if token == "do()":
+                    enabled = True
+                elif token == "don't()":
+                    enabled = False
+                else:
+                    product = int(match.group(1)) * int(match.group(2))
+                    total_sum += product
+                    if enabled:
+                        enabled_sum += product
+
+            if not chunk:
+                break
+            carry = buffer[max(resume, safe_end, 0) :]
+
+    return total_sum, enabled_sum
+
+
+def main_streaming():
+    total_sum, enabled_sum = scan_memory()
+    print("Part One:")
+    print(total_sum)
+    print("Part Two:")
+    print(enabled_sum)
+
+
+def summarize_range(
+    path: str, start: int, end: int
+) -> tuple[int, int, int, bool | None]:
+    """
+    Scans the tokens starting in [start, end) and returns the total mul sum,
+    the enabled mul sum if the range starts enabled, the enabled mul sum if it
+    starts disabled, and the last do/don't state set in the range, if any.
+    """
+    with open(path, "rb") as fobj:
+        fobj.seek(start)
+        # Read a little past the end so a straddling token can finish
+        data = fobj.read(end - start + MAX_TOKEN_LEN - 1)
+
+    total_sum = 0
+    enabled_start_sum = 0
+    disabled_start_sum = 0
+    final_state: bool | None = None
+
+    for match in TOKEN_BYTES_REGEX.finditer(data):
+        if match.start() >= end - start:
+            break
+        token = match.group()
+        if token == b"do()":
+            final_state = True
+        elif token == b"don't()":
+            final_state = False
+        else:
+            product = int(match.group(1)) * int(match.group(2))
+            total_sum += product
+            if final_state is None:
+                enabled_start_sum += product
+            elif final_state:
+                enabled_start_sum += product
+                disabled_start_sum += product
+
+    return total_sum, enabled_start_sum, disabled_start_sum, final_state
+
+
+def scan_memory_parallel(
+    path: str = "day3/day3.txt",
+    chunk_size: int = 1 << 22,
+    num_workers: int | None = None,
+) -> tuple[int, int]:
+    file_size = os.path.getsize(path)
+    starts = list(range(0, file_size, chunk_size))
+    ends = [min(start + chunk_size, file_size) for start in starts]
+
+    total_sum = 0
+    enabled_sum = 0
+    enabled = True
+
+    with ProcessPoolExecutor(num_workers) as executor:
+        summaries = executor.map(summarize_range, [path] * len(starts), starts, ends)
+        for range_sum, enabled_start_sum, disabled_start_sum, final_state in summaries:
+            total_sum += range_sum
+            enabled_sum += enabled_start_sum if enabled else disabled_start_sum
+            if final_state is not None:
+                enabled = final_state
+
+    return total_sum, enabled_sum
+
+
+def main_parallel():
+    total_sum, enabled_sum = scan_memory_parallel()
+    print("Part One:")
+    print(total_sum)
+    print("Part Two:")
+    print(enabled_sum)
+
+
 def main():
     instructions: list[str] = parse_input()
     print("Part One:")
@@ -1,5 +1,71 @@
-def in_bounds(x: int, y: int, width: int, height: int) -> bool:
-    return x > -1 and x < width and y > -1 and y < height
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Forward reading direction of each line family, the backward directions are
+# covered by searching for reversed words along the same lines.
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@dataclass(frozen=True)
+class WordMatch:
+    word: str
+    ri: int
+    ci: int
+    dr: int
+    dc: int
+
+
+class WordAutomaton:
+    """Aho-Corasick automaton reporting every pattern ending at each index."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.outputs: list[list[int]] = [[]]
+
+        for pattern_index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.outputs[state].append(pattern_index)
+
+        queue: deque[int] = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def search(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yields (end index, pattern index) for every occurrence in text."""
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_index in outputs[state]:
+                yield index, pattern_index
 
 
 def parse_input() -> list[str]:
@@ -7,159 +73,253 @@ def parse_input() -> list[str]:
         return [line.strip() for line in fobj.readlines()]
 
 
-def part_one(word_search: list[str]):
-    width = len(word_search[0])
+def grid_lines(
+    word_search: list[str], directions: Iterable[tuple[int, int]] = LINE_DIRECTIONS
+) -> Iterator[tuple[int, int, int, int, str]]:
+    """Yields (start row, start col, dr, dc, text) for every grid line."""
     height = len(word_search)
+    width = len(word_search[0])
 
-    matches = 0
-
-    for ri, row in enumerate(word_search):
-        for ci, col in enumerate(row):
-            if col == "X":
-                # Found a potential match
-                matches += find_matches(word_search, ri, ci, width, height)
+    for dr, dc in directions:
+        starts: list[tuple[int, int]] = []
+        if dr == 0:
+            starts = [(ri, 0) for ri in range(height)]
+        elif dc == 0:
+            starts = [(0, ci) for ci in range(width)]
+        elif dc > 0:
+            starts = [(ri, 0) for ri in range(height - 1, 0, -1)]
+            starts += [(0, ci) for ci in range(width)]
+        else:
+            starts = [(0, ci) for ci in range(width)]
+            starts += [(ri, width - 1) for ri in range(1, height)]
+
+        for start_ri, start_ci in starts:
+            ri, ci = start_ri, start_ci
+            chars: list[str] = []
+            while 0 <= ri < height and 0 <= ci < width:
+                chars.append(word_search[ri][ci])
+                ri += dr
+                ci += dc
+            yield start_ri, start_ci, dr, dc, "".join(chars)
+
+
+def find_words(
+    word_search: list[str],
+    words: Iterable[str],
+    directions: Iterable[tuple[int, int]] = LINE_DIRECTIONS,
+) -> list[WordMatch]:
+    """Finds every word reading forwards or backwards along the given lines."""
+    words = list(words)
+    # Pattern 2i is word i read forwards, 2i + 1 is word i read backwards
+    automaton = WordAutomaton(
+        pattern for word in words for pattern in (word, word[::-1])
+    )
+    matches: list[WordMatch] = []
+
+    for start_ri, start_ci, dr, dc, text in grid_lines(word_search, directions):
+        for end, pattern_index in automaton.search(text):
+            word = words[pattern_index // 2]
+            first = end - len(word) + 1
+            if pattern_index % 2 == 0:
+                offset, sign = first, 1
+            else:
+                offset, sign = end, -1
+            matches.append(
+                WordMatch(
+                    word,
+                    start_ri + offset * dr,
+                    start_ci + offset * dc,
+                    dr * sign,
+                    dc * sign,
+                )
+            )
 
     return matches
 
 
+def find_x_matches(
+    word_search: list[str], words: Iterable[str]
+) -> dict[str, set[tuple[int, int]]]:
+    """
+    Finds the centers where an odd length word crosses itself along both
+    diagonals, in either reading direction.
+    """
+    words = list(words)
+    diagonal_centers: dict[tuple[str, int], set[tuple[int, int]]] = {}
+    for match in find_words(word_search, words, ((1, 1), (1, -1))):
+        half = len(match.word) // 2
+        center = (match.ri + half * match.dr, match.ci + half * match.dc)
+        # Reading direction doesn't matter, only which diagonal it's on
+        diagonal = match.dr * match.dc
+        diagonal_centers.setdefault((match.word, diagonal), set()).add(center)
+
+    return {
+        word: diagonal_centers.get((word, 1), set())
+        & diagonal_centers.get((word, -1), set())
+        for word in words
+        if len(word) % 2 == 1
+    }
+
+
+def part_one(word_search: list[str]):
+    return len(find_words(word_search, ["XMAS"]))
+
+
 def part_two(word_search: list[str]):
-    width = len(word_search[0])
-    height = len(word_search)
+    return len(find_x_matches(word_search, ["MAS"])["MAS"])
 
-    matches = 0
 
-    for ri, row in enumerate(word_search):
-        for ci, col in enumerate(row):
-            if col == "A":
-                matches += 1 if is_x_match(word_search, ri, ci, width, height) else 0
+def grid_array(word_search: list[str]) -> "np.ndarray":
+    import numpy as np
 
-    return matches
+    flat = "".join(word_search).encode()
+    return np.frombuffer(flat, dtype=np.uint8).reshape(len(word_search), -1)
 
 
-def is_x_match(
-    word_search: list[str], ri: int, ci: int, width: int, height: int
-) -> bool:
-    coordinates = [
-        (ri - 1, ci - 1),
-        (ri + 1, ci - 1),
-        (ri - 1, ci + 1),
-        (ri + 1, ci + 1),
-    ]
-    all_in_bounds = all([in_bounds(y, x, width, height) for y, x in coordinates])
-    if not all_in_bounds:
-        return False
-
-    def mas_match(r1: int, c1: int, r2: int, c2: int) -> bool:
-        return (word_search[r1][c1] == "S" and word_search[r2][c2] == "M") or (
-            word_search[r1][c1] == "M" and word_search[r2][c2] == "S"
+def count_word_shifted(grid: "np.ndarray", word: str, block_rows: int = 32) -> int:
+    """
+    Matches a word along every line direction by ANDing shifted slices of
+    per-letter boolean arrays. The grid is walked in blocks of rows so the
+    letter arrays and the running match stay in cache.
+    """
+    import numpy as np
+
+    height, width = grid.shape
+    span = len(word) - 1
+    found = np.empty((block_rows, width), dtype=bool)
+    num_matches = 0
+
+    for top in range(0, height, block_rows):
+        # Down-steps read up to span rows past the block's start rows
+        block = grid[top : top + block_rows + span]
+        masks = {letter: block == ord(letter) for letter in set(word)}
+        # Backwards directions are the reversed word read forwards
+        for search in (word, word[::-1]):
+            for dr, dc in LINE_DIRECTIONS:
+                rows = min(block_rows, len(block) - dr * span)
+                cols = width - abs(dc) * span
+                if rows <= 0 or cols <= 0:
+                    continue
+                first_col = span if dc < 0 else 0
+                matches = found[:rows, :cols]
+                matches[:] = masks[search[0]][:rows, first_col : first_col + cols]
+                for i, letter in enumerate(search[1:], 1):
+                    ri = i * dr
+                    ci = first_col + i * dc
+                    matches &= masks[letter][ri : ri + rows, ci : ci + cols]
+                num_matches += int(np.count_nonzero(matches))
+
+    return num_matches
+
+
+def part_one_shifted(word_search: list[str]) -> int:
+    return count_word_shifted(grid_array(word_search), "XMAS")
+
+
+def part_two_shifted(word_search: list[str], block_rows: int = 32) -> int:
+    import numpy as np
+
+    grid = grid_array(word_search)
+    num_matches = 0
+
+    for top in range(0, len(grid) - 2, block_rows):
+        block = grid[top : top + block_rows + 2]
+        m_mask = block == ord("M")
+        s_mask = block == ord("S")
+        # Corner cells of every center in the block, centers being [1:-1, 1:-1]
+        above_left = (slice(None, -2), slice(None, -2))
+        above_right = (slice(None, -2), slice(2, None))
+        below_left = (slice(2, None), slice(None, -2))
+        below_right = (slice(2, None), slice(2, None))
+        found = block[1:-1, 1:-1] == ord("A")
+        found &= (m_mask[above_left] & s_mask[below_right]) | (
+            s_mask[above_left] & m_mask[below_right]
         )
+        found &= (m_mask[above_right] & s_mask[below_left]) | (
+            s_mask[above_right] & m_mask[below_left]
+        )
+        num_matches += int(np.count_nonzero(found))
+
+    return num_matches
 
-    return mas_match(ri - 1, ci - 1, ri + 1, ci + 1) and mas_match(
-        ri + 1, ci - 1, ri - 1, ci + 1
-    )
 
+def main_shifted():
+    word_search = parse_input()
+    print("Part One:")
+    print(part_one_shifted(word_search))
+    print("Part Two:")
+    print(part_two_shifted(word_search))
 
-def find_matches(
-    word_search: list[str], ri: int, ci: int, width: int, height: int
-) -> int:
-    search = "XMAS"
+
+def row_letter_bits(word_search: list[str], letters: str) -> dict[str, list[int]]:
+    """Bit c of a letter's row mask is set when that row has the letter at c."""
+    alphabet = set("".join(word_search)) | set(letters)
+    bits: dict[str, list[int]] = {}
+    for letter in letters:
+        table = str.maketrans({ch: "1" if ch == letter else "0" for ch in alphabet})
+        bits[letter] = [int(row.translate(table)[::-1], 2) for row in word_search]
+
+    return bits
+
+
+def count_word_bits(bits: dict[str, list[int]], word: str) -> int:
+    """
+    Every direction is handled on row masks alone: a step of dr rows reads
+    the row dr below, and a step of dc columns shifts that row right by dc.
+    """
     num_matches = 0
+    height = len(next(iter(bits.values())))
+
+    for search in (word, word[::-1]):
+        rows = [bits[letter] for letter in search]
+        for dr, dc in LINE_DIRECTIONS:
+            for ri in range(height - dr * (len(search) - 1)):
+                found = rows[0][ri]
+                for i in range(1, len(search)):
+                    row = rows[i][ri + i * dr]
+                    shift = i * dc
+                    found &= row >> shift if shift >= 0 else row << -shift
+                    if not found:
+                        break
+                num_matches += found.bit_count()
+
+    return num_matches
 
-    # Horizontal
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci + i, ri, width, height)
-            or search[i] != word_search[ri][ci + i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci - i, ri, width, height)
-            or search[i] != word_search[ri][ci - i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    # Vertical
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci, ri + i, width, height)
-            or search[i] != word_search[ri + i][ci]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci, ri - i, width, height)
-            or search[i] != word_search[ri - i][ci]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    # Diagonal Left
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci - i, ri - i, width, height)
-            or search[i] != word_search[ri - i][ci - i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci - i, ri + i, width, height)
-            or search[i] != word_search[ri + i][ci - i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    # Diagonal Right
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci + i, ri - i, width, height)
-            or search[i] != word_search[ri - i][ci + i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
-
-    is_match = True
-    for i in range(1, len(search)):
-        if (
-            not in_bounds(ci + i, ri + i, width, height)
-            or search[i] != word_search[ri + i][ci + i]
-        ):
-            is_match = False
-            break
-
-    num_matches += 1 if is_match else 0
+
+def part_one_bits(word_search: list[str]) -> int:
+    return count_word_bits(row_letter_bits(word_search, "XMAS"), "XMAS")
+
+
+def part_two_bits(word_search: list[str]) -> int:
+    bits = row_letter_bits(word_search, "MAS")
+    m_rows = bits["M"]
+    s_rows = bits["S"]
+    num_matches = 0
+
+    for ri in range(1, len(word_search) - 1):
+        above_m, above_s = m_rows[ri - 1], s_rows[ri - 1]
+        below_m, below_s = m_rows[ri + 1], s_rows[ri + 1]
+        # Down-right diagonal is above-left to below-right, and down-left is
+        # above-right to below-left
+        down_right = ((above_m << 1) & (below_s >> 1)) | (
+            (above_s << 1) & (below_m >> 1)
+        )
+        down_left = ((above_m >> 1) & (below_s << 1)) | (
+            (above_s >> 1) & (below_m << 1)
+        )
+        num_matches += (bits["A"][ri] & down_right & down_left).bit_count()
 
     return num_matches
 
 
+def main_bits():
+    word_search = parse_input()
+    print("Part One:")
+    print(part_one_bits(word_search))
+    print("Part Two:")
+    print(part_two_bits(word_search))
+
+
 def main():
     word_search = parse_input()
     print("Part One:")
@@ -1,6 +1,155 @@
+from collections import deque
+from collections.abc import Iterator
 from functools import cmp_to_key
 
 
+class RuleIndex:
+    """
+    Rules compiled once into successor sets. Each distinct set of pages gets
+    the rules restricted to it, and on reordering a topological rank per
+    page, both cached for later updates over the same pages.
+    """
+
+    def __init__(self, rules: list[tuple[int, ...]]):
+        self.successors: dict[int, set[int]] = {}
+        for key, value in rules:
+            vset = self.successors.setdefault(key, set())
+            vset.add(value)
+
+        self.restricted: dict[frozenset[int], list[tuple[int, int]]] = {}
+        self.ranked: dict[frozenset[int], dict[int, int]] = {}
+
+    def restrict(self, pages: frozenset[int]) -> list[tuple[int, int]]:
+        if pages not in self.restricted:
+            self.restricted[pages] = [
+                (page, succ)
+                for page in pages
+                for succ in self.successors.get(page, ())
+                if succ in pages
+            ]
+        return self.restricted[pages]
+
+    def rank(self, pages: frozenset[int]) -> dict[int, int]:
+        if pages in self.ranked:
+            return self.ranked[pages]
+
+        in_degrees = dict.fromkeys(pages, 0)
+        after: dict[int, list[int]] = {page: [] for page in pages}
+        for page, succ in self.restrict(pages):
+            in_degrees[succ] += 1
+            after[page].append(succ)
+
+        ready = deque(sorted(page for page, degree in in_degrees.items() if not degree))
+        ranks: dict[int, int] = {}
+        while ready:
+            page = ready.popleft()
+            ranks[page] = len(ranks)
+            for succ in after[page]:
+                in_degrees[succ] -= 1
+                if not in_degrees[succ]:
+                    ready.append(succ)
+
+        if len(ranks) != len(pages):
+            raise ValueError(f"Rules are cyclic over pages {sorted(pages)}")
+
+        self.ranked[pages] = ranks
+        return ranks
+
+    def is_valid(self, update: tuple[int, ...]) -> bool:
+        edges = self.restrict(frozenset(update))
+        positions = {page: i for i, page in enumerate(update)}
+        return all(positions[page] < positions[succ] for page, succ in edges)
+
+    def reorder(self, update: tuple[int, ...]) -> list[int]:
+        ranks = self.rank(frozenset(update))
+        return sorted(update, key=ranks.__getitem__)
+
+
+class PrecedenceIndex:
+    """
+    Pages mapped to dense ids with one int bitset per page, where bit j of
+    page i's row means i must come before page j. With transitive set, the
+    rows are closed over every implied rule and cyclic rule sets are refused.
+    """
+
+    def __init__(self, rules: list[tuple[int, ...]], transitive: bool = False):
+        self.ids: dict[int, int] = {}
+        for rule in rules:
+            for page in rule:
+                self.ids.setdefault(page, len(self.ids))
+
+        self.rows = [0] * len(self.ids)
+        for key, value in rules:
+            self.rows[self.ids[key]] |= 1 << self.ids[value]
+
+        if transitive:
+            cyclic_pages = self.close()
+            if cyclic_pages:
+                raise ValueError(f"Inconsistent rules, cycle through {cyclic_pages}")
+
+    def close(self) -> list[int]:
+        """Transitively closes the rows and returns the pages on a cycle."""
+        rows = self.rows
+        for k in range(len(rows)):
+            k_bit = 1 << k
+            k_row = rows[k]
+            for i, row in enumerate(rows):
+                if row & k_bit:
+                    rows[i] = row | k_row
+
+        return sorted(page for page, i in self.ids.items() if rows[i] >> i & 1)
+
+    def must_precede(self, first: int, second: int) -> bool:
+        if first not in self.ids or second not in self.ids:
+            return False
+        return bool(self.rows[self.ids[first]] >> self.ids[second] & 1)
+
+    def is_valid(self, update: tuple[int, ...]) -> bool:
+        rows = self.rows
+        seen = 0
+        for page in update:
+            page_id = self.ids.get(page)
+            if page_id is None:
+                continue
+            # A page already placed that this one must precede
+            if rows[page_id] & seen:
+                return False
+            seen |= 1 << page_id
+
+        return True
+
+    def reorder(self, update: tuple[int, ...]) -> list[int]:
+        """
+        Peels the update's pages off in topological layers, where a layer is
+        every remaining page that no remaining page must precede.
+        """
+        rows = self.rows
+        remaining = 0
+        for page in update:
+            if page in self.ids:
+                remaining |= 1 << self.ids[page]
+
+        ranks: dict[int, int] = {}
+        while remaining:
+            preceded = 0
+            pending = remaining
+            while pending:
+                low_bit = pending & -pending
+                preceded |= rows[low_bit.bit_length() - 1]
+                pending ^= low_bit
+            layer = remaining & ~preceded
+            if not layer:
+                raise ValueError(f"Rules are cyclic over pages {sorted(update)}")
+            remaining ^= layer
+            while layer:
+                low_bit = layer & -layer
+                ranks[low_bit.bit_length() - 1] = len(ranks)
+                layer ^= low_bit
+
+        # Pages without rules can go anywhere, so they keep rank -1
+        return sorted(update, key=lambda page: ranks.get(self.ids.get(page, -1), -1))
+
+
 def parse_input() -> tuple[list[tuple[int, ...]], list[tuple[int, ...]]]:
     with open("day5/day5.txt") as fobj:
         lines = fobj.readlines()
@@ -61,6 +210,77 @@ def part_two(rules: list[tuple[int, ...]], updates: list[tuple[int, ...]]) -> in
     return middle_sums
 
 
+def part_one_ranked(rule_index: RuleIndex, updates: list[tuple[int, ...]]) -> int:
+    return sum(
+        update[len(update) // 2] for update in updates if rule_index.is_valid(update)
+    )
+
+
+def part_two_ranked(rule_index: RuleIndex, updates: list[tuple[int, ...]]) -> int:
+    middle_sums = 0
+    for update in updates:
+        if not rule_index.is_valid(update):
+            sorted_update = rule_index.reorder(update)
+            middle_sums += sorted_update[len(sorted_update) // 2]
+
+    return middle_sums
+
+
+def main_ranked():
+    rules, updates = parse_input()
+    rule_index = RuleIndex(rules)
+    print("Part One:")
+    print(part_one_ranked(rule_index, updates))
+    print("Part Two:")
+    print(part_two_ranked(rule_index, updates))
+
+
+def stream_input(path: str = "day5/day5.txt") -> Iterator[tuple[int, ...]]:
+    """Yields every rule, then an empty tuple, then every update."""
+    with open(path) as fobj:
+        for line in fobj:
+            line = line.strip()
+            if not line:
+                break
+            yield tuple(int(page) for page in line.split("|"))
+
+        yield ()
+        for line in fobj:
+            if line.strip():
+                yield tuple(int(page) for page in line.split(","))
+
+
+def part_one_two_streamed(
+    path: str = "day5/day5.txt", transitive: bool = False
+) -> tuple[int, int]:
+    lines = stream_input(path)
+    rules: list[tuple[int, ...]] = []
+    for rule in lines:
+        if not rule:
+            break
+        rules.append(rule)
+
+    precedence = PrecedenceIndex(rules, transitive)
+    valid_sums = 0
+    reordered_sums = 0
+    for update in lines:
+        if precedence.is_valid(update):
+            valid_sums += update[len(update) // 2]
+        else:
+            sorted_update = precedence.reorder(update)
+            reordered_sums += sorted_update[len(sorted_update) // 2]
+
+    return valid_sums, reordered_sums
+
+
+def main_streamed():
+    valid_sums, reordered_sums = part_one_two_streamed()
+    print("Part One:")
+    print(valid_sums)
+    print("Part Two:")
+    print(reordered_sums)
+
+
 def main():
     rules, updates = parse_input()
     print("Part One:")
@@ -1,4 +1,11 @@
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+from typing import Self
 
 
 class Direction(Enum):
@@ -21,6 +28,105 @@ def turn_right(dir: Direction) -> Direction:
         raise ValueError("Unknown Direction")
 
 
+@dataclass
+class ObstacleIndex:
+    """Sorted obstacle columns per row and obstacle rows per column."""
+
+    row_obstacles: list[list[int]]
+    col_obstacles: list[list[int]]
+
+    @classmethod
+    def from_maze(cls, maze: list[list[str]]) -> Self:
+        rlen, clen = find_bounds(maze)
+        row_obstacles: list[list[int]] = [[] for _ in range(rlen)]
+        col_obstacles: list[list[int]] = [[] for _ in range(clen)]
+        for ri, row in enumerate(maze):
+            for ci, col in enumerate(row):
+                if col == "#":
+                    row_obstacles[ri].append(ci)
+                    col_obstacles[ci].append(ri)
+
+        return cls(row_obstacles, col_obstacles)
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes, rlen: int, clen: int) -> Self:
+        """Builds the index from a maze packed row by row with no separators."""
+        row_obstacles: list[list[int]] = [[] for _ in range(rlen)]
+        col_obstacles: list[list[int]] = [[] for _ in range(clen)]
+        index = buffer.find(b"#", 0, rlen * clen)
+        while index != -1:
+            ri, ci = divmod(index, clen)
+            row_obstacles[ri].append(ci)
+            col_obstacles[ci].append(ri)
+            index = buffer.find(b"#", index + 1, rlen * clen)
+
+        return cls(row_obstacles, col_obstacles)
+
+    def next_stop(
+        self,
+        guard_row: int,
+        guard_col: int,
+        dir: Direction,
+        extra: tuple[int, int] | None = None,
+    ) -> tuple[int, int] | None:
+        """
+        Where the guard stops in front of the next obstacle, including an
+        optional extra one, or None if it walks out of the maze first.
+        """
+        extra_ri, extra_ci = extra if extra is not None else (-1, -1)
+
+        if dir is Direction.NORTH or dir is Direction.SOUTH:
+            obstacles = self.col_obstacles[guard_col]
+            on_line = extra_ci == guard_col
+            if dir is Direction.NORTH:
+                i = bisect_left(obstacles, guard_row) - 1
+                hit = obstacles[i] if i >= 0 else None
+                if on_line and extra_ri < guard_row and (hit is None or extra_ri > hit):
+                    hit = extra_ri
+                return (hit + 1, guard_col) if hit is not None else None
+            i = bisect_right(obstacles, guard_row)
+            hit = obstacles[i] if i < len(obstacles) else None
+            if on_line and extra_ri > guard_row and (hit is None or extra_ri < hit):
+                hit = extra_ri
+            return (hit - 1, guard_col) if hit is not None else None
+        elif dir is Direction.EAST or dir is Direction.WEST:
+            obstacles = self.row_obstacles[guard_row]
+            on_line = extra_ri == guard_row
+            if dir is Direction.WEST:
+                i = bisect_left(obstacles, guard_col) - 1
+                hit = obstacles[i] if i >= 0 else None
+                if on_line and extra_ci < guard_col and (hit is None or extra_ci > hit):
+                    hit = extra_ci
+                return (guard_row, hit + 1) if hit is not None else None
+            i = bisect_right(obstacles, guard_col)
+            hit = obstacles[i] if i < len(obstacles) else None
+            if on_line and extra_ci > guard_col and (hit is None or extra_ci < hit):
+                hit = extra_ci
+            return (guard_row, hit - 1) if hit is not None else None
+        else:
+            raise ValueError("Invalid Direction")
+
+
+class VisitedStates:
+    """
+    Turn states stamped with the epoch of the loop check that last saw them,
+    in slot (ri * clen + ci) * 4 + dir.value - 1. Clearing just starts a new
+    epoch.
+    """
+
+    def __init__(self, rlen: int, clen: int):
+        self.clen = clen
+        self.stamps = array("I", bytes(4 * rlen * clen * 4))
+        self.epoch = 1
+
+    def clear(self):
+        self.epoch += 1
+        if self.epoch == 1 << 32:
+            # Stamps would overflow, so really clear them once
+            self.stamps = array("I", bytes(4 * len(self.stamps)))
+            self.epoch = 1
+
+
 def parse_input() -> list[list[str]]:
     with open("day6/day6.txt") as fobj:
         return [list(line.strip()) for line in fobj.readlines()]
@@ -130,6 +236,144 @@ def part_two(maze: list[list[str]]) -> int:
     return num_loops
 
 
+def is_loop_jumping(
+    obstacles: ObstacleIndex,
+    prev_turns: VisitedStates,
+    guard_row: int,
+    guard_col: int,
+    direction: Direction,
+    extra: tuple[int, int] | None = None,
+) -> bool:
+    prev_turns.clear()
+    stamps = prev_turns.stamps
+    epoch = prev_turns.epoch
+    clen = prev_turns.clen
+
+    while True:
+        stop = obstacles.next_stop(guard_row, guard_col, direction, extra)
+        if stop is None:
+            return False
+        guard_row, guard_col = stop
+        slot = (guard_row * clen + guard_col) * 4 + direction.value - 1
+        if stamps[slot] == epoch:
+            return True
+        stamps[slot] = epoch
+        direction = turn_right(direction)
+
+
+def part_two_jumping(maze: list[list[str]]) -> int:
+    obstacles = ObstacleIndex.from_maze(maze)
+    prev_turns = VisitedStates(*find_bounds(maze))
+    guard_row, guard_col = find_guard(maze)
+
+    return sum(
+        1
+        for candidate in get_guard_entries(maze)
+        if is_loop_jumping(
+            obstacles, prev_turns, guard_row, guard_col, Direction.NORTH, candidate
+        )
+    )
+
+
+def get_guard_entries(
+    maze: list[list[str]],
+) -> dict[tuple[int, int], tuple[int, int, Direction]]:
+    """
+    Maps each cell on the guard's route, other than the start, to the guard's
+    position and direction just before it first steps onto that cell.
+    """
+    guard_row, guard_col = find_guard(maze)
+    rlen, clen = find_bounds(maze)
+    start = (guard_row, guard_col)
+    direction = Direction.NORTH
+    entries: dict[tuple[int, int], tuple[int, int, Direction]] = {}
+
+    while True:
+        next_ri, next_ci = find_next_loc(guard_row, guard_col, direction)
+        if not (0 <= next_ri < rlen and 0 <= next_ci < clen):
+            break
+        if maze[next_ri][next_ci] == "#":
+            direction = turn_right(direction)
+            continue
+        if (next_ri, next_ci) != start and (next_ri, next_ci) not in entries:
+            entries[(next_ri, next_ci)] = (guard_row, guard_col, direction)
+        guard_row, guard_col = next_ri, next_ci
+
+    return entries
+
+
+def part_two_resumed(maze: list[list[str]]) -> int:
+    obstacles = ObstacleIndex.from_maze(maze)
+    prev_turns = VisitedStates(*find_bounds(maze))
+    num_loops = 0
+
+    # The route up to a candidate's first visit can't be affected by it, so
+    # each check starts from there instead of the guard's start
+    for candidate, (guard_row, guard_col, direction) in get_guard_entries(maze).items():
+        if is_loop_jumping(
+            obstacles, prev_turns, guard_row, guard_col, direction, candidate
+        ):
+            num_loops += 1
+
+    return num_loops
+
+
+# Set in each worker process by init_loop_worker
+worker_obstacles: ObstacleIndex | None = None
+worker_turns: VisitedStates | None = None
+
+
+def init_loop_worker(shm_name: str, rlen: int, clen: int):
+    global worker_obstacles, worker_turns
+    shm = SharedMemory(name=shm_name)
+    try:
+        buf = shm.buf
+        assert buf is not None
+        worker_obstacles = ObstacleIndex.from_buffer(bytes(buf), rlen, clen)
+    finally:
+        shm.close()
+    worker_turns = VisitedStates(rlen, clen)
+
+
+def count_loops(
+    candidates: list[tuple[tuple[int, int], tuple[int, int, Direction]]],
+) -> int:
+    assert worker_obstacles is not None and worker_turns is not None
+    num_loops = 0
+    for candidate, (guard_row, guard_col, direction) in candidates:
+        # The candidate is only an overlay, the shared maze is never modified
+        if is_loop_jumping(
+            worker_obstacles, worker_turns, guard_row, guard_col, direction, candidate
+        ):
+            num_loops += 1
+
+    return num_loops
+
+
+def part_two_parallel(maze: list[list[str]], num_workers: int | None = None) -> int:
+    num_workers = num_workers or os.cpu_count() or 1
+    rlen, clen = find_bounds(maze)
+    candidates = list(get_guard_entries(maze).items())
+    # A few batches per worker to even out the uneven loop check costs
+    num_batches = 4 * num_workers
+    batches = [candidates[i::num_batches] for i in range(num_batches)]
+
+    shm = SharedMemory(create=True, size=max(rlen * clen, 1))
+    try:
+        buf = shm.buf
+        assert buf is not None
+        buf[: rlen * clen] = "".join("".join(row) for row in maze).encode()
+        with ProcessPoolExecutor(
+            num_workers,
+            initializer=init_loop_worker,
+            initargs=(shm.name, rlen, clen),
+        ) as executor:
+            return sum(executor.map(count_loops, batches))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
 def main():
     maze = parse_input()
     print("Part One:")
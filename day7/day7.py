@@ -1,18 +1,23 @@
-from itertools import product
+import os
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import compress, islice, product, repeat
+from math import inf
+from operator import add, eq, gt, le, mul
 
 
 def parse_input() -> list[tuple[int, tuple[int, ...]]]:
-    parsed: list[tuple[int, tuple[int, ...]]] = []
     with open("day7/day7.txt") as fobj:
         lines = fobj.readlines()
 
-    for line in lines:
-        split = line.strip().split(":")
-        test_value = int(split[0])
-        operands = tuple(int(val) for val in split[1].strip().split(" "))
-        parsed.append((test_value, operands))
+    return [parse_equation(line) for line in lines]
+
 
-    return parsed
+def parse_equation(line: str) -> tuple[int, tuple[int, ...]]:
+    split = line.strip().split(":")
+    test_value = int(split[0])
+    operands = tuple(int(val) for val in split[1].strip().split(" "))
+    return test_value, operands
 
 
 def calc_test_value(first_value: int, expression: list[tuple[int, str]]) -> int:
@@ -61,6 +66,209 @@ def part_two(equations: list[tuple[int, tuple[int, ...]]]) -> int:
     return total_calibration_result
 
 
+def is_solvable(test_value: int, operands: tuple[int, ...], use_concat: bool) -> bool:
+    """
+    Works back from the test value, undoing the last operand with each
+    operator whose inverse is valid, and gives up on a branch as soon as
+    none is.
+    """
+
+    def undo(target: int, index: int) -> bool:
+        if index == 0:
+            return target == operands[0]
+
+        operand = operands[index]
+        if target >= operand and undo(target - operand, index - 1):
+            return True
+        if operand == 0:
+            # Anything times zero is zero
+            if target == 0:
+                return True
+        elif target % operand == 0 and undo(target // operand, index - 1):
+            return True
+        if use_concat:
+            suffix = 10 ** len(str(operand))
+            if target % suffix == operand and undo(target // suffix, index - 1):
+                return True
+
+        return False
+
+    return undo(test_value, len(operands) - 1)
+
+
+def part_one_reverse(equations: list[tuple[int, tuple[int, ...]]]) -> int:
+    return sum(
+        output for output, operands in equations if is_solvable(output, operands, False)
+    )
+
+
+def part_two_reverse(equations: list[tuple[int, tuple[int, ...]]]) -> int:
+    return sum(
+        output for output, operands in equations if is_solvable(output, operands, True)
+    )
+
+
+def main_reverse():
+    equations = parse_input()
+    print("Part One:")
+    print(part_one_reverse(equations))
+    print("Part Two:")
+    print(part_two_reverse(equations))
+
+
+def solve_frontier(
+    equations: list[tuple[int, tuple[int, ...]]], use_concat: bool
+) -> list[bool]:
+    """
+    Evaluates every equation in one forward pass. The frontier holds each
+    equation's reachable partial values as parallel owner/value columns, and
+    each operand step applies every operator to the whole frontier at once,
+    dropping values that already overshoot their equation's test value.
+    The frontier still grows with each operator, so this is much slower than
+    the reverse search in is_solvable on the real input.
+    """
+    targets = [output for output, _ in equations]
+    # Partial values only ever grow, unless a later operand is zero
+    last_zeros = [
+        max((i for i, operand in enumerate(operands) if operand == 0), default=0)
+        for _, operands in equations
+    ]
+    solved = [False] * len(equations)
+    owners = list(range(len(equations)))
+    values = [operands[0] for _, operands in equations]
+    lengths = [len(operands) for _, operands in equations]
+    num_steps = max(lengths, default=0)
+
+    for step in range(1, num_steps + 1):
+        # Equations out of operands check their final frontier and drop out
+        active = list(map(gt, map(lengths.__getitem__, owners), repeat(step)))
+        finished = [not is_active for is_active in active]
+        finished_owners = list(compress(owners, finished))
+        finished_values = compress(values, finished)
+        hits = map(eq, finished_values, map(targets.__getitem__, finished_owners))
+        for owner in compress(finished_owners, hits):
+            solved[owner] = True
+
+        owners = list(compress(owners, active))
+        values = list(compress(values, active))
+        if not owners:
+            break
+
+        # Finished equations get a placeholder that no active owner reads
+        step_operands = [
+            operands[step] if step < len(operands) else 0 for _, operands in equations
+        ]
+        operand_col = list(map(step_operands.__getitem__, owners))
+        candidates = list(map(add, values, operand_col))
+        candidates += map(mul, values, operand_col)
+        num_operators = 2
+        if use_concat:
+            # Concatenation is a shift by the operand's decimal width
+            step_shifts = [10 ** len(str(operand)) for operand in step_operands]
+            shift_col = map(step_shifts.__getitem__, owners)
+            candidates += map(add, map(mul, values, shift_col), operand_col)
+            num_operators = 3
+
+        limits = [
+            target if last_zero <= step else inf
+            for target, last_zero in zip(targets, last_zeros)
+        ]
+        candidate_owners = owners * num_operators
+        fits = map(le, candidates, map(limits.__getitem__, candidate_owners))
+        frontier = dict.fromkeys(compress(zip(candidate_owners, candidates), fits))
+        owners = [owner for owner, _ in frontier]
+        values = [value for _, value in frontier]
+
+    return solved
+
+
+def part_one_frontier(equations: list[tuple[int, tuple[int, ...]]]) -> int:
+    solved = solve_frontier(equations, False)
+    return sum(compress((output for output, _ in equations), solved))
+
+
+def part_two_frontier(equations: list[tuple[int, tuple[int, ...]]]) -> int:
+    solved = solve_frontier(equations, True)
+    return sum(compress((output for output, _ in equations), solved))
+
+
+def main_frontier():
+    equations = parse_input()
+    print("Part One:")
+    print(part_one_frontier(equations))
+    print("Part Two:")
+    print(part_two_frontier(equations))
+
+
+def iter_equation_chunks(
+    path: str = "day7/day7.txt", chunk_lines: int = 1 << 14
+) -> Iterator[list[str]]:
+    with open(path) as fobj:
+        while chunk := list(islice(fobj, chunk_lines)):
+            yield chunk
+
+
+def calibrate_chunk(lines: list[str]) -> tuple[int, int]:
+    total_one = 0
+    total_two = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        output, operands = parse_equation(line)
+        # Anything solvable with + and * is solvable with | too
+        if is_solvable(output, operands, False):
+            total_one += output
+            total_two += output
+        elif is_solvable(output, operands, True):
+            total_two += output
+
+    return total_one, total_two
+
+
+def part_one_two_parallel(
+    path: str = "day7/day7.txt",
+    chunk_lines: int = 1 << 14,
+    num_workers: int | None = None,
+    max_pending: int | None = None,
+) -> tuple[int, int]:
+    """
+    Sums chunk totals in whatever order the chunks finish, since some lines
+    need far deeper searches than others. A new chunk is only read once the
+    number of chunks in flight drops below max_pending.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * num_workers
+    total_one = 0
+    total_two = 0
+    in_flight: set[Future[tuple[int, int]]] = set()
+
+    def collect(done: set[Future[tuple[int, int]]]):
+        nonlocal total_one, total_two
+        for future in done:
+            chunk_one, chunk_two = future.result()
+            total_one += chunk_one
+            total_two += chunk_two
+
+    with ProcessPoolExecutor(num_workers) as executor:
+        for chunk in iter_equation_chunks(path, chunk_lines):
+            if len(in_flight) >= max_pending:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(executor.submit(calibrate_chunk, chunk))
+
+        collect(wait(in_flight).done)
+
+    return total_one, total_two
+
+
+def main_parallel():
+    total_one, total_two = part_one_two_parallel()
+    print("Part One:")
+    print(total_one)
+    print("Part Two:")
+    print(total_two)
+
+
 def main():
     equations = parse_input()
     print("Part One:")
@@ -1,4 +1,7 @@
+from collections import Counter
 from itertools import combinations
+from math import gcd
+from typing import Self
 
 
 def parse_input() -> list[list[str]]:
@@ -102,6 +105,279 @@ def part_two(antenna_map: list[list[str]]):
     return len(antinodes)
 
 
+def find_antennas(antenna_map: list[list[str]]) -> dict[str, list[tuple[int, int]]]:
+    antennas: dict[str, list[tuple[int, int]]] = {}
+    for ri, row in enumerate(antenna_map):
+        for ci, col in enumerate(row):
+            if col.isalnum():
+                locs = antennas.setdefault(col, [])
+                locs.append((ri, ci))
+
+    return antennas
+
+
+def step_range(start: int, step: int, size: int) -> tuple[int, int]:
+    """Smallest and largest k keeping start + k * step within [0, size)."""
+    if step > 0:
+        return -(start // step), (size - 1 - start) // step
+    elif step < 0:
+        return -((size - 1 - start) // -step), start // -step
+    else:
+        raise ValueError("Step must be non-zero")
+
+
+def resonant_line(
+    height: int, width: int, ant_one: tuple[int, int], ant_two: tuple[int, int]
+) -> tuple[int, int, int, int, int]:
+    """
+    Returns the first row and column, the row and column step and the number
+    of grid points on the line through both antennas, walking top to bottom.
+    """
+    r_dist = ant_two[0] - ant_one[0]
+    c_dist = ant_two[1] - ant_one[1]
+    divisor = gcd(r_dist, c_dist)
+    r_step = r_dist // divisor
+    c_step = c_dist // divisor
+    if r_step < 0 or (r_step == 0 and c_step < 0):
+        r_step, c_step = -r_step, -c_step
+
+    # A zero step never leaves the grid along that axis
+    k_ranges: list[tuple[int, int]] = []
+    if r_step:
+        k_ranges.append(step_range(ant_one[0], r_step, height))
+    if c_step:
+        k_ranges.append(step_range(ant_one[1], c_step, width))
+    first = max(lo for lo, _ in k_ranges)
+    count = min(hi for _, hi in k_ranges) - first + 1
+
+    return (
+        ant_one[0] + first * r_step,
+        ant_one[1] + first * c_step,
+        r_step,
+        c_step,
+        count,
+    )
+
+
+def mark_resonant_line(
+    grid: bytearray,
+    height: int,
+    width: int,
+    ant_one: tuple[int, int],
+    ant_two: tuple[int, int],
+):
+    ri, ci, r_step, c_step, count = resonant_line(height, width, ant_one, ant_two)
+    # Top to bottom, so the flat step is always positive
+    flat_step = r_step * width + c_step
+    start = ri * width + ci
+    grid[start : start + (count - 1) * flat_step + 1 : flat_step] = b"\x01" * count
+
+
+def part_one_dense(antenna_map: list[list[str]]) -> int:
+    height = len(antenna_map)
+    width = len(antenna_map[0])
+    grid = bytearray(height * width)
+
+    for locs in find_antennas(antenna_map).values():
+        for (r_one, c_one), (r_two, c_two) in combinations(locs, 2):
+            for ri, ci in (
+                (2 * r_one - r_two, 2 * c_one - c_two),
+                (2 * r_two - r_one, 2 * c_two - c_one),
+            ):
+                if 0 <= ri < height and 0 <= ci < width:
+                    grid[ri * width + ci] = 1
+
+    return grid.count(1)
+
+
+def part_two_dense(antenna_map: list[list[str]]) -> int:
+    """
+    Unlike get_resonant_antinodes, this marks every grid point on the line,
+    including any between the antennas when their offsets share a divisor.
+    """
+    height = len(antenna_map)
+    width = len(antenna_map[0])
+    grid = bytearray(height * width)
+
+    for locs in find_antennas(antenna_map).values():
+        for ant_one, ant_two in combinations(locs, 2):
+            mark_resonant_line(grid, height, width, ant_one, ant_two)
+
+    return grid.count(1)
+
+
+def main_dense():
+    antenna_map = parse_input()
+    print("Part One:")
+    print(part_one_dense(antenna_map))
+    print("Part Two:")
+    print(part_two_dense(antenna_map))
+
+
+class AntennaMap:
+    """
+    Antennas by frequency with a reference count on every antinode cell, so
+    adding or removing one antenna only touches its pairs with the other
+    antennas of the same frequency.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.antennas: dict[str, set[tuple[int, int]]] = {}
+        self.occupied: dict[tuple[int, int], str] = {}
+        self.antinodes: Counter[tuple[int, int]] = Counter()
+        self.resonant_antinodes: Counter[tuple[int, int]] = Counter()
+
+    @classmethod
+    def from_map(cls, antenna_map: list[list[str]]) -> Self:
+        incremental = cls(len(antenna_map), len(antenna_map[0]))
+        for antenna, locs in find_antennas(antenna_map).items():
+            for loc in locs:
+                incremental.add_antenna(antenna, loc)
+
+        return incremental
+
+    @property
+    def num_antinodes(self) -> int:
+        return len(self.antinodes)
+
+    @property
+    def num_resonant_antinodes(self) -> int:
+        return len(self.resonant_antinodes)
+
+    def add_antenna(self, antenna: str, loc: tuple[int, int]):
+        if loc in self.occupied:
+            raise ValueError(f"{loc} already has antenna {self.occupied[loc]}")
+        if not (0 <= loc[0] < self.height and 0 <= loc[1] < self.width):
+            raise ValueError(f"{loc} is outside the map")
+
+        locs = self.antennas.setdefault(antenna, set())
+        for other in locs:
+            self.update_pair(loc, other, 1)
+        locs.add(loc)
+        self.occupied[loc] = antenna
+
+    def remove_antenna(self, loc: tuple[int, int]):
+        if loc not in self.occupied:
+            raise ValueError(f"No antenna at {loc}")
+
+        antenna = self.occupied.pop(loc)
+        locs = self.antennas[antenna]
+        locs.remove(loc)
+        for other in locs:
+            self.update_pair(loc, other, -1)
+
+    def update_pair(
+        self, ant_one: tuple[int, int], ant_two: tuple[int, int], delta: int
+    ):
+        r_dist = ant_two[0] - ant_one[0]
+        c_dist = ant_two[1] - ant_one[1]
+        for ri, ci in (
+            (ant_one[0] - r_dist, ant_one[1] - c_dist),
+            (ant_two[0] + r_dist, ant_two[1] + c_dist),
+        ):
+            if 0 <= ri < self.height and 0 <= ci < self.width:
+                self.adjust(self.antinodes, (ri, ci), delta)
+
+        ri, ci, r_step, c_step, count = resonant_line(
+            self.height, self.width, ant_one, ant_two
+        )
+        for _ in range(count):
+            self.adjust(self.resonant_antinodes, (ri, ci), delta)
+            ri += r_step
+            ci += c_step
+
+    @staticmethod
+    def adjust(counts: Counter[tuple[int, int]], loc: tuple[int, int], delta: int):
+        counts[loc] += delta
+        # Only cells still referenced by some pair are kept
+        if not counts[loc]:
+            del counts[loc]
+
+
+def parse_sparse_input(
+    path: str,
+) -> tuple[int, int, dict[str, list[tuple[int, int]]]]:
+    """
+    Sparse maps start with a "height width" line, followed by one
+    "frequency row col" line per antenna.
+    """
+    with open(path) as fobj:
+        height, width = (int(size) for size in fobj.readline().split())
+        antennas: dict[str, list[tuple[int, int]]] = {}
+        for line in fobj:
+            if not line.strip():
+                continue
+            antenna, ri, ci = line.split()
+            locs = antennas.setdefault(antenna, [])
+            locs.append((int(ri), int(ci)))
+
+    return height, width, antennas
+
+
+def count_antinodes_sparse(
+    height: int, width: int, antennas: dict[str, list[tuple[int, int]]]
+) -> int:
+    antinodes: set[tuple[int, int]] = set()
+    for locs in antennas.values():
+        for (r_one, c_one), (r_two, c_two) in combinations(locs, 2):
+            for ri, ci in (
+                (2 * r_one - r_two, 2 * c_one - c_two),
+                (2 * r_two - r_one, 2 * c_two - c_one),
+            ):
+                if 0 <= ri < height and 0 <= ci < width:
+                    antinodes.add((ri, ci))
+
+    return len(antinodes)
+
+
+def count_resonant_antinodes_sparse(
+    height: int, width: int, antennas: dict[str, list[tuple[int, int]]]
+) -> int:
+    """
+    Each distinct line b * r - a * c = k, with (a, b) the reduced direction,
+    contributes its lattice points inside the bounds. A point where m lines
+    cross was counted m times, so m - 1 is taken back off for it.
+    """
+    lines: dict[tuple[int, int, int], tuple[int, int]] = {}
+    for locs in antennas.values():
+        for ant_one, ant_two in combinations(locs, 2):
+            r_dist = ant_two[0] - ant_one[0]
+            c_dist = ant_two[1] - ant_one[1]
+            divisor = gcd(r_dist, c_dist)
+            a, b = r_dist // divisor, c_dist // divisor
+            if a < 0 or (a == 0 and b < 0):
+                a, b = -a, -b
+            lines.setdefault((a, b, b * ant_one[0] - a * ant_one[1]), ant_one)
+
+    num_antinodes = 0
+    for (a, b, _), (ri, ci) in lines.items():
+        num_antinodes += resonant_line(height, width, (ri, ci), (ri + a, ci + b))[4]
+
+    crossings: dict[tuple[int, int], set[tuple[int, int, int]]] = {}
+    for line_one, line_two in combinations(lines, 2):
+        a_one, b_one, k_one = line_one
+        a_two, b_two, k_two = line_two
+        det = a_one * b_two - a_two * b_one
+        if det == 0:
+            # Parallel, distinct lines never meet
+            continue
+        r_num = a_one * k_two - a_two * k_one
+        c_num = b_one * k_two - b_two * k_one
+        if r_num % det or c_num % det:
+            continue
+        ri, ci = r_num // det, c_num // det
+        if 0 <= ri < height and 0 <= ci < width:
+            crossing = crossings.setdefault((ri, ci), set())
+            crossing.update((line_one, line_two))
+
+    for crossing in crossings.values():
+        num_antinodes -= len(crossing) - 1
+
+    return num_antinodes
+
+
 def main():
     antenna_map = parse_input()
     print("Part One:")
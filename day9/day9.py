@@ -1,3 +1,6 @@
+import heapq
+
+
 def parse_input() -> str:
     with open("day9/day9.txt") as fobj:
         return fobj.read().strip()
@@ -131,6 +134,48 @@ def part_two(file_map: str) -> int:
     return checksum
 
 
+def part_two_heaps(file_map: str) -> int:
+    """
+    Keeps one min-heap of start offsets per free block size. Sizes are single
+    digits, so the leftmost block that fits is the smallest top across at
+    most nine heaps.
+    """
+    checksum = 0
+    fpos = 0
+    file_locations: list[tuple[int, int]] = []
+    free_space_heaps: list[list[int]] = [[] for _ in range(10)]
+
+    for findex, size in enumerate(file_map):
+        size_num = int(size)
+        if findex % 2 == 0:
+            file_locations.append((fpos, size_num))
+        elif size_num > 0:
+            # Offsets arrive in increasing order, so each list is already a heap
+            free_space_heaps[size_num].append(fpos)
+        fpos += size_num
+
+    for fnum in range(len(file_locations) - 1, -1, -1):
+        fstart, fsize = file_locations[fnum]
+        best_size = 0
+        best_start = fstart
+        for size in range(fsize, 10):
+            heap = free_space_heaps[size]
+            if heap and heap[0] < best_start:
+                best_size = size
+                best_start = heap[0]
+
+        if best_size:
+            heapq.heappop(free_space_heaps[best_size])
+            if best_size > fsize:
+                heapq.heappush(free_space_heaps[best_size - fsize], best_start + fsize)
+            fstart = best_start
+
+        # Sum of fnum * position over fsize blocks starting at fstart
+        checksum += fnum * (fsize * fstart + fsize * (fsize - 1) // 2)
+
+    return checksum
+
+
 def print_fs(
     file_locs: dict[int, tuple[int, int]], fs_blocks: dict[int, set[tuple[int, int]]]
 ):